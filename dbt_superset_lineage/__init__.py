@@ -48,6 +48,13 @@ def push_descriptions(dbt_project_dir: str = typer.Option('.', help="Directory p
                                                                                  "Superset columns. This is to allow "
                                                                                  "databases to catch up in "
                                                                                  "the meantime."),
+                      superset_dataset_cache_dir: str = typer.Option(None, help="Directory in which the list of "
+                                                                                "Superset datasets should be cached "
+                                                                                "between runs, keyed by SUPERSET_URL "
+                                                                                "and SUPERSET_DB_ID. Cache files "
+                                                                                "expire after 24 hours; delete them "
+                                                                                "to pick up newly added datasets "
+                                                                                "sooner."),
                       superset_access_token: str = typer.Option(None, envvar="SUPERSET_ACCESS_TOKEN",
                                                                 help="Access token to Superset API."
                                                                      "Can be automatically generated if "
@@ -57,6 +64,7 @@ def push_descriptions(dbt_project_dir: str = typer.Option('.', help="Directory p
 
     push_descriptions_main(dbt_project_dir, dbt_db_name,
                            superset_url, superset_db_id, superset_refresh_columns, superset_pause_after_update,
+                           superset_dataset_cache_dir,
                            superset_access_token, superset_refresh_token)
 
 
@@ -1,6 +1,7 @@
 import json
 import logging
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from pathlib import Path
 from requests import HTTPError
@@ -12,6 +13,17 @@ from .superset_api import Superset
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
 logging.getLogger('sqlfluff').setLevel(level=logging.WARNING)
 
+MAX_WORKERS = 16  # size of the thread pool used for parallel requests to Superset
+
+# precompiled regexes for ``get_tables_from_sql_simple``
+_LINE_COMMENT_RE = re.compile(r'(--.*)|(#.*)')
+_WS_RE = re.compile(r'\s+')
+_BLOCK_COMMENT_RE = re.compile(r'(/\*(.|\n)*\*/)')
+_TABLE_RE = re.compile(r'\b(from|join)\b\s+(\"?(\w+)\"?(\.))?\"?(\w+)\"?\b')
+
+# precompiled regex for ``get_exposures_dict``
+_NON_WORD_RE = re.compile(r'[^\w ]+')
+
 
 def crawl_recursive(seq, key):
     if isinstance(seq, dict):
@@ -41,12 +53,11 @@ def get_tables_from_sql_fluff(sql, dialect):
 
 
 def get_tables_from_sql_simple(sql):
-    sql = re.sub(r'(--.*)|(#.*)', '', sql)  # remove line comments
-    sql = re.sub(r'\s+', ' ', sql).lower()  # make it one line
-    sql = re.sub(r'(/\*(.|\n)*\*/)', '', sql)  # remove block comments
+    sql = _LINE_COMMENT_RE.sub('', sql)  # remove line comments
+    sql = _WS_RE.sub(' ', sql).lower()  # make it one line
+    sql = _BLOCK_COMMENT_RE.sub('', sql)  # remove block comments
 
-    regex = re.compile(r'\b(from|join)\b\s+(\"?(\w+)\"?(\.))?\"?(\w+)\"?\b')  # regex for tables
-    tables_match = regex.findall(sql)
+    tables_match = _TABLE_RE.findall(sql)
     tables = [table[2] + '.' + table[4] if table[2] != '' else table[4]  # full name if with schema
               for table in tables_match
               if table[4] != 'unnest']  # remove false positive
@@ -106,6 +117,42 @@ def get_tables_from_dbt(dbt_manifest, dbt_db_name):
     return tables
 
 
+def get_dashboard_info(superset, superset_url, dashboard_id):
+    logging.info("Getting info for dashboard with ID=%d.", dashboard_id)
+    res_dashboard = superset.request('GET', f'/dashboard/{dashboard_id}')
+    result_dashboard = res_dashboard['result']
+
+    title = result_dashboard['dashboard_title']
+    url = superset_url + '/superset/dashboard/' + str(dashboard_id)
+    owner_name = result_dashboard['owners'][0]['first_name'] + ' ' + result_dashboard['owners'][0]['last_name']
+
+    logging.info("Getting info about dashboard's datasets.")
+    res_datasets = superset.request('GET', f'/dashboard/{dashboard_id}/datasets')
+    result_datasets = res_datasets['result']
+
+    # parse dataset names split into parts
+    datasets_parsed = [[dataset['database']['name'], dataset['schema'], dataset['table_name']]
+                       for dataset in result_datasets]
+    datasets_parsed = [['None' if x is None else x for x in dataset]
+                       for dataset in datasets_parsed]  # replace None with string "None" if something missing
+
+    # put them all together to get "database.schema.table"
+    datasets_w_db = ['.'.join(dataset) for dataset in datasets_parsed]
+
+    # skip database, i.e. first item, to get only "schema.table"
+    datasets_wo_db = ['.'.join(dataset[1:]) for dataset in datasets_parsed]
+
+    dashboard = {
+        'id': dashboard_id,
+        'title': title,
+        'url': url,
+        'owner_name': owner_name,
+        'datasets': datasets_wo_db  # add in "schema.table" format
+    }
+
+    return dashboard, datasets_w_db
+
+
 def get_dashboards_from_superset(superset, superset_url, superset_db_id):
     logging.info("Getting published dashboards from Superset.")
     page_number = 0
@@ -134,47 +181,23 @@ def get_dashboards_from_superset(superset, superset_url, superset_db_id):
 
     logging.info("There are %d published dashboards in Superset.", len(dashboards_id))
 
+    # getting the info is network-I/O-bound, so run the dashboards through a thread pool
     dashboards = []
     dashboards_datasets_w_db = set()
-    for i, d in enumerate(dashboards_id):
-        try:
-            logging.info("Getting info for dashboard %d/%d.", i + 1, len(dashboards_id))
-            res_dashboard = superset.request('GET', f'/dashboard/{d}')
-            result_dashboard = res_dashboard['result']
-
-            dashboard_id = result_dashboard['id']
-            title = result_dashboard['dashboard_title']
-            url = superset_url + '/superset/dashboard/' + str(dashboard_id)
-            owner_name = result_dashboard['owners'][0]['first_name'] + ' ' + result_dashboard['owners'][0]['last_name']
-
-            logging.info("Getting info about dashboard's datasets.")
-            res_datasets = superset.request('GET', f'/dashboard/{d}/datasets')
-            result_datasets = res_datasets['result']
-
-            # parse dataset names split into parts
-            datasets_parsed = [[dataset['database']['name'], dataset['schema'], dataset['table_name']]
-                               for dataset in result_datasets]
-            datasets_parsed = [['None' if x is None else x for x in dataset]
-                               for dataset in datasets_parsed]  # replace None with string "None" if something missing
-
-            # put them all together to get "database.schema.table"
-            datasets_w_db = ['.'.join(dataset) for dataset in datasets_parsed]
-            dashboards_datasets_w_db.update(datasets_w_db)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {executor.submit(get_dashboard_info, superset, superset_url, d): d
+                   for d in dashboards_id}
+        for future in as_completed(futures):
+            d = futures[future]
+            try:
+                dashboard, datasets_w_db = future.result()
+            except HTTPError as e:
+                logging.error("Info about the dashboard with ID=%d wasn't (fully) obtained. "
+                              "Check the error below.", d, exc_info=e)
+                continue
 
-            # skip database, i.e. first item, to get only "schema.table"
-            datasets_wo_db = ['.'.join(dataset[1:]) for dataset in datasets_parsed]
-
-            dashboard = {
-                'id': dashboard_id,
-                'title': title,
-                'url': url,
-                'owner_name': owner_name,
-                'datasets': datasets_wo_db  # add in "schema.table" format
-            }
             dashboards.append(dashboard)
-        except HTTPError as e:
-            logging.error("Info about the dashboard with ID=%d wasn't (fully) obtained. "
-                          "Check the error below.", d, exc_info=e)
+            dashboards_datasets_w_db.update(datasets_w_db)
 
     # test if unique when database disregarded
     # loop to get the name of duplicated dataset and work with unique set of datasets w db
@@ -271,7 +294,7 @@ def get_exposures_dict(dashboards, exposures):
     exposures_dict = [{
         # remove non-word characters (unless it's space), replace spaces with underscores, make lowercase
         # required since dbt v1.3
-        'name': re.sub(r'[^\w ]+', '', dashboard['title']).replace(' ', '_').lower(),
+        'name': _NON_WORD_RE.sub('', dashboard['title']).replace(' ', '_').lower(),
         'label': dashboard['title'],
         'type': 'dashboard',
         'url': dashboard['url'],
@@ -1,96 +1,191 @@
+import functools
 import json
 import logging
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from html import unescape
+from itertools import chain
+from pathlib import Path
 
-from bs4 import BeautifulSoup
-from markdown import markdown
+import ijson
+from markdown import Markdown
 from requests import HTTPError
 
 from .superset_api import Superset
 
 logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
 
+MAX_WORKERS = 16  # size of the thread pool used for parallel requests to Superset
+PAGE_SIZE = 100  # how many items to request per page of Superset list endpoints
+DATASET_CACHE_TTL = 24 * 60 * 60  # seconds before a cached dataset list expires
+
+# precompiled regexes for ``convert_markdown_to_plain_text``
+_PRE_RE = re.compile(r'<pre>.*?</pre>', re.DOTALL)
+_TAG_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+
+# characters and line prefixes that suggest a description contains markdown
+# (emphasis, code, headings incl. setext underlines, links, raw HTML, entities,
+# block quotes, lists, horizontal rules)
+_MD_TOKEN_RE = re.compile(r'[\\*_`#\[\]<>&]'
+                          r'|^[ \t]*([-+]|\d+\.)[ \t]'
+                          r'|^[ \t]*(=+|-{2,})[ \t]*$', re.MULTILINE)
+
+_markdown_local = threading.local()
+
+
+def _get_markdown():
+    # the ``markdown()`` convenience function builds a fresh ``Markdown``
+    # instance on every call; reuse one per thread instead (instances are
+    # stateful, so they cannot be shared across the worker threads)
+    if not hasattr(_markdown_local, 'instance'):
+        _markdown_local.instance = Markdown()
+    return _markdown_local.instance
+
+
+def get_datasets_page_from_superset(superset, page_number):
+    logging.info("Getting page %d.", page_number + 1)
+
+    payload = {
+        'q': json.dumps({
+            'page': page_number,
+            'page_size': PAGE_SIZE,
+            # select the columns/description/owners details upfront so that
+            # ``add_superset_columns`` can skip its per-dataset GET
+            'columns': ['id', 'table_name', 'schema', 'kind', 'database.id',
+                        'columns', 'description', 'owners']
+        })
+    }
+    return superset.request('GET', '/dataset/', params=payload)
+
 
 def get_datasets_from_superset(superset, superset_db_id):
     logging.info("Getting physical datasets from Superset.")
 
-    page_number = 0
+    # the first page reveals the total count, the remaining pages are known
+    # upfront and can be fetched in parallel
+    first_page = get_datasets_page_from_superset(superset, 0)
+    page_count = -(-first_page['count'] // PAGE_SIZE)  # ceiling division
+
+    pages = [first_page['result']]
+    if page_count > 1:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            pages += [page['result'] for page
+                      in executor.map(functools.partial(get_datasets_page_from_superset, superset),
+                                      range(1, page_count))]
+
     datasets = []
     datasets_keys = set()
-    while True:
-        logging.info("Getting page %d.", page_number + 1)
-
-        payload = {
-            'q': json.dumps({
-                'page': page_number,
-                'page_size': 100
-            })
-        }
-        res = superset.request('GET', '/dataset/', params=payload)
-
-        result = res['result']
-        if result:
-            for r in result:
-                kind = r['kind']
-                database_id = r['database']['id']
-
-                if kind == 'physical' \
-                        and (superset_db_id is None or database_id == superset_db_id):
-
-                    dataset_id = r['id']
-
-                    name = r['table_name']
-                    schema = r['schema']
-                    dataset_key = f'{schema}.{name}'  # used as unique identifier
-
-                    dataset_dict = {
-                        'id': dataset_id,
-                        'key': dataset_key
-                    }
-
-                    # fail if it breaks uniqueness constraint
-                    assert dataset_key not in datasets_keys, \
-                        f"Dataset {dataset_key} is a duplicate name (schema + table) " \
-                        "across databases. " \
-                        "This would result in incorrect matching between Superset and dbt. " \
-                        "To fix this, remove duplicates or add the ``superset_db_id`` argument."
-
-                    datasets_keys.add(dataset_key)
-                    datasets.append(dataset_dict)
-            page_number += 1
-        else:
-            break
+    for result in pages:
+        for r in result:
+            kind = r['kind']
+            database_id = r['database']['id']
+
+            if kind == 'physical' \
+                    and (superset_db_id is None or database_id == superset_db_id):
+
+                dataset_id = r['id']
+
+                name = r['table_name']
+                schema = r['schema']
+                dataset_key = f'{schema}.{name}'  # used as unique identifier
+
+                dataset_dict = {
+                    'id': dataset_id,
+                    'key': dataset_key
+                }
+
+                # carry over the details when the list endpoint provides them
+                for field in ['columns', 'description', 'owners']:
+                    if field in r:
+                        dataset_dict[field] = r[field]
+
+                # fail if it breaks uniqueness constraint
+                assert dataset_key not in datasets_keys, \
+                    f"Dataset {dataset_key} is a duplicate name (schema + table) " \
+                    "across databases. " \
+                    "This would result in incorrect matching between Superset and dbt. " \
+                    "To fix this, remove duplicates or add the ``superset_db_id`` argument."
+
+                datasets_keys.add(dataset_key)
+                datasets.append(dataset_dict)
 
     assert datasets, "There are no datasets in Superset!"
 
     return datasets
 
 
+def get_datasets_from_superset_cached(superset, superset_db_id, cache_dir):
+    """Wraps ``get_datasets_from_superset`` with an optional on-disk cache.
+
+    When ``cache_dir`` is set, the list of dataset IDs and keys is stored there
+    in a file keyed by the Superset URL and ``superset_db_id``, and reused on
+    subsequent runs until it is older than ``DATASET_CACHE_TTL``, saving the
+    paging through ``/dataset/``. Only the ID/key mapping is cached, so
+    descriptions and columns are still fetched fresh per dataset. Delete the
+    file to pick up datasets added to Superset since it was written.
+    """
+
+    if cache_dir is None:
+        return get_datasets_from_superset(superset, superset_db_id)
+
+    # key by instance URL as well, so e.g. staging and prod Superset sharing
+    # a cache dir don't reuse each other's dataset IDs
+    url_key = re.sub(r'\W+', '_', superset.api_url).strip('_')
+    db_key = 'all' if superset_db_id is None else superset_db_id
+    cache_path = Path(cache_dir) / f'superset_datasets_{url_key}_db_{db_key}.json'
+
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < DATASET_CACHE_TTL:
+        logging.info("Loading Superset datasets from the cache at %s.", cache_path)
+        with open(cache_path) as f:
+            return json.load(f)
+
+    datasets = get_datasets_from_superset(superset, superset_db_id)
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(cache_path, 'w') as f:
+        json.dump([{'id': dataset['id'], 'key': dataset['key']} for dataset in datasets], f)
+    logging.info("Cached Superset datasets at %s.", cache_path)
+
+    return datasets
+
+
+def load_dbt_manifest(manifest_path):
+    """Loads the ``nodes`` and ``sources`` sections of a manifest.json file.
+
+    The manifest can grow to hundreds of megabytes while only these two
+    sections are needed, so they are stream-parsed with ``ijson`` instead of
+    loading the whole document into memory.
+    """
+
+    dbt_manifest = {}
+    with open(manifest_path, 'rb') as f:
+        for table_type in ['nodes', 'sources']:
+            f.seek(0)
+            dbt_manifest[table_type] = dict(ijson.kvitems(f, table_type))
+
+    return dbt_manifest
+
+
 def get_tables_from_dbt(dbt_manifest, dbt_db_name):
     tables = {}
-    for table_type in ['nodes', 'sources']:
-        manifest_subset = dbt_manifest[table_type]
+    for table in chain(dbt_manifest['nodes'].values(), dbt_manifest['sources'].values()):
+        if dbt_db_name is not None and table['database'] != dbt_db_name:
+            continue
 
-        for table_key_long in manifest_subset:
-            table = manifest_subset[table_key_long]
-            name = table['name']
-            schema = table['schema']
-            database = table['database']
+        table_key_short = table['schema'] + '.' + table['name']
 
-            table_key_short = schema + '.' + name
-            columns = table['columns']
-            description = table['description']
+        # fail if it breaks uniqueness constraint
+        assert table_key_short not in tables, \
+            f"Table {table_key_short} is a duplicate name (schema + table) " \
+            f"across databases. " \
+            "This would result in incorrect matching between Superset and dbt. " \
+            "To fix this, remove duplicates or add the ``dbt_db_name`` argument."
 
-            if dbt_db_name is None or database == dbt_db_name:
-                # fail if it breaks uniqueness constraint
-                assert table_key_short not in tables, \
-                    f"Table {table_key_short} is a duplicate name (schema + table) " \
-                    f"across databases. " \
-                    "This would result in incorrect matching between Superset and dbt. " \
-                    "To fix this, remove duplicates or add the ``dbt_db_name`` argument."
-
-                tables[table_key_short] = {'columns': columns, 'description': description}
+        tables[table_key_short] = {'columns': table['columns'],
+                                   'description': table['description']}
 
     assert tables, "Manifest is empty!"
 
@@ -103,6 +198,14 @@ def refresh_columns_in_superset(superset, dataset_id):
 
 
 def add_superset_columns(superset, dataset):
+    # the list endpoint is not obliged to shape columns like the show endpoint
+    # does, so only reuse them when each column carries what the merge needs
+    if all(field in dataset for field in ['columns', 'description', 'owners']) \
+            and all(all(field in column for field in ['column_name', 'id', 'description', 'expression'])
+                    for column in dataset['columns']):
+        logging.info("Reusing columns info from the dataset list response.")
+        return dataset
+
     logging.info("Pulling fresh columns info from Superset.")
 
     res = superset.request('GET', f"/dataset/{dataset['id']}")
@@ -118,27 +221,46 @@ def add_superset_columns(superset, dataset):
 def convert_markdown_to_plain_text(md_string):
     """Converts a markdown string to plaintext.
 
-    The following solution is used:
-    https://gist.github.com/lorey/eb15a7f3338f959a78cc3661fbc255fe
+    Descriptions are often reused across columns and models (e.g. doc blocks),
+    so results are memoized and identical strings are converted only once.
+    Empty and missing descriptions short-circuit before the cache.
     """
 
-    # md -> html -> text since BeautifulSoup can extract text cleanly
-    html = markdown(md_string)
+    if not md_string:
+        return ''
+
+    return _convert_markdown_to_plain_text(md_string)
 
-    # remove code snippets
-    html = re.sub(r'<pre>(.*?)</pre>', ' ', html)
-    html = re.sub(r'<code>(.*?)</code >', ' ', html)
+
+@functools.lru_cache(maxsize=4096)
+def _convert_markdown_to_plain_text(md_string):
+    """Does the actual conversion behind ``convert_markdown_to_plain_text``.
+
+    Renders the markdown to HTML and strips the tags with precompiled regexes,
+    which is much cheaper than building and walking a BeautifulSoup tree.
+    Strings without any markdown tokens skip the rendering entirely.
+    """
+
+    # most descriptions are plain sentences, which render to themselves anyway
+    if not _MD_TOKEN_RE.search(md_string):
+        return _WS_RE.sub(' ', md_string).strip().replace('→', '->')
+
+    # md -> html -> text
+    html = _get_markdown().reset().convert(md_string)
+
+    # remove code blocks; inline code keeps its text, only the tags are stripped
+    html = _PRE_RE.sub(' ', html)
 
     # extract text
-    soup = BeautifulSoup(html, 'html.parser')
-    text = ''.join(soup.findAll(text=True))
+    text = _TAG_RE.sub(' ', html)
+    text = unescape(text)
 
     # make one line
-    single_line = re.sub(r'\s+', ' ', text)
+    single_line = _WS_RE.sub(' ', text).strip()
 
     # make fixes
-    single_line = re.sub('→', '->', single_line)
-    single_line = re.sub('<null>', '"null"', single_line)
+    single_line = single_line.replace('→', '->')
+    single_line = single_line.replace('<null>', '"null"')
 
     return single_line
 
@@ -146,12 +268,13 @@ def convert_markdown_to_plain_text(md_string):
 def merge_columns_info(dataset, tables):
     logging.info("Merging columns info from Superset and manifest.json file.")
 
-    key = dataset['key']
+    dbt_table = tables.get(dataset['key'], {})
+
     sst_columns = dataset['columns']
-    dbt_columns = tables.get(key, {}).get('columns', {})
+    dbt_columns = dbt_table.get('columns', {})  # already a dict keyed by column name
 
     sst_description = dataset['description']
-    dbt_description = tables.get(key, {}).get('description')
+    dbt_description = dbt_table.get('description')
 
     sst_owners = dataset['owners']
 
@@ -167,12 +290,12 @@ def merge_columns_info(dataset, tables):
         }
 
         # add column descriptions
-        if column_name in dbt_columns \
-                and 'description' in dbt_columns[column_name] \
+        dbt_column = dbt_columns.get(column_name)
+        if dbt_column is not None \
+                and 'description' in dbt_column \
                 and (sst_column['expression'] is None  # database columns
                      or sst_column['expression'] == ''):
-            description = dbt_columns[column_name]['description']
-            description = convert_markdown_to_plain_text(description)
+            description = convert_markdown_to_plain_text(dbt_column['description'])
         else:
             description = sst_column['description']
         column_new['description'] = description
@@ -193,8 +316,20 @@ def merge_columns_info(dataset, tables):
     return dataset
 
 
+def _normalize_description(description):
+    # Superset often stores descriptions with different surrounding or internal
+    # whitespace than the converted dbt text; such differences are invisible
+    # in the UI and not worth a PUT
+    return _WS_RE.sub(' ', description).strip() if description else ''
+
+
+def _columns_by_id(columns):
+    return {column['id']: (column['column_name'], _normalize_description(column['description']))
+            for column in columns}
+
+
 def check_columns_equal(lst1, lst2):
-    return sorted(lst1, key=lambda c: c["id"]) == sorted(lst2, key=lambda c: c["id"])
+    return _columns_by_id(lst1) == _columns_by_id(lst2)
 
 
 def pause_after_update(superset_pause_after_update):
@@ -213,14 +348,9 @@ def put_descriptions_to_superset(superset, dataset, superset_pause_after_update)
     owners_new = dataset['owners_new']
 
     description_old = dataset['description']
-    columns_old = [{
-        'column_name': col['column_name'],
-        'id': col['id'],
-        'description': col['description']
-    } for col in dataset['columns']]
-
-    if description_new != description_old or \
-       not check_columns_equal(columns_new, columns_old):
+
+    if _normalize_description(description_new) != _normalize_description(description_old) or \
+       not check_columns_equal(columns_new, dataset['columns']):
         payload = {'description': description_new, 'columns': columns_new, 'owners': owners_new}
         superset.request('PUT', f"/dataset/{dataset['id']}?override_columns=false", json=payload)
         pause_after_update(superset_pause_after_update)
@@ -228,8 +358,28 @@ def put_descriptions_to_superset(superset, dataset, superset_pause_after_update)
         logging.info("Skipping PUT execute request as nothing would be updated.")
 
 
+def process_dataset(superset, sst_dataset, dbt_tables,
+                    superset_refresh_columns, superset_pause_after_update):
+    sst_dataset_id = sst_dataset['id']
+    logging.info("Processing dataset with ID=%d.", sst_dataset_id)
+    try:
+        if superset_refresh_columns:
+            refresh_columns_in_superset(superset, sst_dataset_id)
+            pause_after_update(superset_pause_after_update)
+            # the refresh invalidates the details obtained from the list endpoint
+            for field in ['columns', 'description', 'owners']:
+                sst_dataset.pop(field, None)
+        sst_dataset_w_cols = add_superset_columns(superset, sst_dataset)
+        sst_dataset_w_cols_new = merge_columns_info(sst_dataset_w_cols, dbt_tables)
+        put_descriptions_to_superset(superset, sst_dataset_w_cols_new, superset_pause_after_update)
+    except HTTPError as e:
+        logging.error("The dataset with ID=%d wasn't updated. Check the error below.",
+                      sst_dataset_id, exc_info=e)
+
+
 def main(dbt_project_dir, dbt_db_name,
          superset_url, superset_db_id, superset_refresh_columns, superset_pause_after_update,
+         superset_dataset_cache_dir,
          superset_access_token, superset_refresh_token):
 
     # require at least one token for Superset
@@ -243,29 +393,24 @@ def main(dbt_project_dir, dbt_db_name,
 
     logging.info("Starting the script!")
 
-    sst_datasets = get_datasets_from_superset(superset, superset_db_id)
+    sst_datasets = get_datasets_from_superset_cached(superset, superset_db_id,
+                                                     superset_dataset_cache_dir)
     logging.info("There are %d physical datasets in Superset overall.", len(sst_datasets))
 
-    with open(f'{dbt_project_dir}/target/manifest.json') as f:
-        dbt_manifest = json.load(f)
+    dbt_manifest = load_dbt_manifest(f'{dbt_project_dir}/target/manifest.json')
 
     dbt_tables = get_tables_from_dbt(dbt_manifest, dbt_db_name)
 
     sst_datasets_dbt_filtered = [d for d in sst_datasets if d["key"] in dbt_tables]
     logging.info("There are %d physical datasets in Superset with a match in dbt.", len(sst_datasets_dbt_filtered))
 
-    for i, sst_dataset in enumerate(sst_datasets_dbt_filtered):
-        logging.info("Processing dataset %d/%d.", i + 1, len(sst_datasets_dbt_filtered))
-        sst_dataset_id = sst_dataset['id']
-        try:
-            if superset_refresh_columns:
-                refresh_columns_in_superset(superset, sst_dataset_id)
-                pause_after_update(superset_pause_after_update)
-            sst_dataset_w_cols = add_superset_columns(superset, sst_dataset)
-            sst_dataset_w_cols_new = merge_columns_info(sst_dataset_w_cols, dbt_tables)
-            put_descriptions_to_superset(superset, sst_dataset_w_cols_new, superset_pause_after_update)
-        except HTTPError as e:
-            logging.error("The dataset with ID=%d wasn't updated. Check the error below.",
-                          sst_dataset_id, exc_info=e)
+    # the work is network-I/O-bound, so process the datasets in parallel;
+    # ``process_dataset`` handles HTTPError itself, anything else propagates
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = [executor.submit(process_dataset, superset, sst_dataset, dbt_tables,
+                                   superset_refresh_columns, superset_pause_after_update)
+                   for sst_dataset in sst_datasets_dbt_filtered]
+        for future in as_completed(futures):
+            future.result()
 
     logging.info("All done!")
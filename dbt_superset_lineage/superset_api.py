@@ -1,6 +1,8 @@
 import logging
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +27,19 @@ class Superset:
         self.access_token = access_token
         self.refresh_token = refresh_token
 
+        # all requests go to the same host, so share a session with a connection pool
+        # sized for the thread pools issuing parallel requests, plus retries
+        # for transient gateway errors
+        self.session = requests.Session()
+        # raise_on_status is off so that exhausted retries still return the
+        # response and surface as HTTPError from raise_for_status(), not RetryError
+        adapter = HTTPAdapter(pool_connections=64, pool_maxsize=64,
+                              max_retries=Retry(total=3, backoff_factor=0.3,
+                                                status_forcelist=[502, 503, 504],
+                                                raise_on_status=False))
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
         if self.access_token is None:
             self._refresh_access_token()
 
@@ -78,14 +93,14 @@ class Superset:
             headers = {}
 
         url = self.api_url + endpoint
-        res = requests.request(method, url, headers=self._headers(**headers), **request_kwargs)
+        res = self.session.request(method, url, headers=self._headers(**headers), **request_kwargs)
 
         logger.debug("Request finished with status: %d", res.status_code)
 
         if refresh_token_if_needed and res.status_code == 401 \
                 and res.json().get('msg') == 'Token has expired' and self._refresh_access_token():
             logger.debug("Retrying %s request for endpoint %s with refreshed token")
-            res = requests.request(method, url, headers=self._headers(**headers))
+            res = self.session.request(method, url, headers=self._headers(**headers))
             logger.debug("Request finished with status: %d", res.status_code)
 
         res.raise_for_status()